@@ -1,178 +1,424 @@
 import streamlit as st
 import pandas as pd
-import json
+import numpy as np
+import orjson
+import ijson
+import hashlib
+import os
+import pickle
 import plotly.express as px
-from collections import Counter
-from matplotlib_venn import venn2
-import matplotlib.pyplot as plt
+import plotly.graph_objects as go
 
 # --- CONFIGURATION AND DATA LOADING ---
+DATA_FILES = ["datasets/WWTrends.json", "datasets/USTrends.json", "datasets/WeLoveTheEarth.json"]
+CACHE_DIR = "cache"
+# Bump whenever the processed output changes shape or meaning so stale disk caches are ignored
+CACHE_VERSION = 1
+# Set TWITTER_DASHBOARD_POLARS=1 (with polars installed) to aggregate tweets with Polars;
+# it is only imported when enabled so the default cold start does not pay for it
+USE_POLARS = False
+if os.environ.get("TWITTER_DASHBOARD_POLARS") == "1":
+    try:
+        import polars as pl
+        USE_POLARS = True
+    except ImportError: # Polars is optional; the pandas path is used without it
+        pass
+# Set TWITTER_DASHBOARD_NUMBA=1 (with numba installed) to compute engagement rates with a JIT kernel;
+# like Polars, it is only imported when enabled
+USE_NUMBA = False
+if os.environ.get("TWITTER_DASHBOARD_NUMBA") == "1":
+    try:
+        import numba
+        USE_NUMBA = True
+    except ImportError: # Numba is optional; the NumPy path is used without it
+        pass
+
+def _cache_paths(key):
+    """Returns the on-disk cache file paths for a given data key."""
+    return (
+        os.path.join(CACHE_DIR, f"{key}_agg.parquet"),
+        os.path.join(CACHE_DIR, f"{key}_bar.parquet"),
+        os.path.join(CACHE_DIR, f"{key}_lang.parquet"),
+        os.path.join(CACHE_DIR, f"{key}_trends.pkl"),
+    )
+
+def load_disk_cache(key):
+    """Reads previously processed data from the disk cache, or returns None on a miss."""
+    agg_path, bar_path, lang_path, trends_path = _cache_paths(key)
+    if not all(os.path.exists(p) for p in (agg_path, bar_path, lang_path, trends_path)):
+        return None
+    try:
+        with open(trends_path, "rb") as f:
+            world_trends, us_trends, common_trends = pickle.load(f)
+        return (world_trends, us_trends, common_trends,
+                pd.read_parquet(agg_path), pd.read_parquet(bar_path), pd.read_parquet(lang_path))
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+        return None # An unreadable cache is treated as a miss and rebuilt
+
+def _write_atomic(path, write):
+    """Writes a file via a temporary name so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _dump_pickle(obj, path):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+
+def save_disk_cache(key, world_trends, us_trends, common_trends, df_agg, df_bar, lang_counts):
+    """Writes processed data to the disk cache so fresh server boots skip JSON parsing."""
+    agg_path, bar_path, lang_path, trends_path = _cache_paths(key)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _write_atomic(agg_path, df_agg.to_parquet)
+        _write_atomic(bar_path, df_bar.to_parquet)
+        _write_atomic(lang_path, lang_counts.to_parquet)
+        _write_atomic(trends_path, lambda p: _dump_pickle((world_trends, us_trends, common_trends), p))
+    except OSError:
+        pass # The disk cache is best-effort; the dashboard still works without it
+
+def aggregate_tweets(path):
+    """Builds the retweet activity DataFrame and its per-tweet aggregate with pandas."""
+    # Stream-parse the tweets so only retweets are ever kept in memory
+    with open(path, "rb") as f:
+        retweets_data = [
+            {
+                'Retweets': tweet['retweet_count'],
+                'TweetId': tweet['retweeted_status']['id'],
+                'Favorites': tweet['retweeted_status']['favorite_count'],
+                'Followers': tweet['retweeted_status']['user']['followers_count'],
+                'ScreenName': tweet['retweeted_status']['user']['screen_name'],
+                'Text': tweet['text'],
+                'Lang': tweet['lang']
+            }
+            for tweet in ijson.items(f, 'item')
+            if 'retweeted_status' in tweet
+        ]
+    # Explicit columns and dtypes keep the schema when the corpus has no retweets at all
+    df = pd.DataFrame.from_records(
+        retweets_data,
+        columns=['Retweets', 'TweetId', 'Favorites', 'Followers', 'ScreenName', 'Text', 'Lang']
+    ).astype({'Retweets': 'int64', 'TweetId': 'int64', 'Favorites': 'int64', 'Followers': 'int64'})
+    # Low-cardinality labels as categoricals so groupby and factorize work on integer codes
+    df['ScreenName'] = df['ScreenName'].astype('category')
+    df['Lang'] = df['Lang'].astype('category')
+    
+    # Create the aggregated DataFrame for the table and charts
+    # We group by ScreenName, original tweet and Followers of the original tweeter; keying the
+    # tweet on its integer id rather than hashing the full Text, which is the same for every retweet
+    # sort=False since we re-sort below
+    df_agg = (
+        df.groupby(['ScreenName', 'TweetId', 'Followers'], sort=False, as_index=False, observed=True)
+        .agg(
+            Total_Retweets=('Retweets', 'sum'),
+            Total_Favorites=('Favorites', 'sum'),
+            Text=('Text', 'first')
+        )
+        [['ScreenName', 'Text', 'Followers', 'Total_Retweets', 'Total_Favorites']]
+    )
+
+    return df, df_agg
+
+def aggregate_tweets_polars(path):
+    """Builds the same DataFrames as aggregate_tweets using Polars' multithreaded group_by."""
+    tweets = pl.read_json(path, infer_schema_length=None)
+    if 'retweeted_status' not in tweets.columns:
+        # No tweet is a retweet, so the struct column was never inferred; return empty frames
+        df = pl.DataFrame(schema={
+            'Retweets': pl.Int64, 'TweetId': pl.Int64, 'Favorites': pl.Int64, 'Followers': pl.Int64,
+            'ScreenName': pl.Categorical, 'Text': pl.String, 'Lang': pl.Categorical
+        })
+    else:
+        df = tweets.filter(pl.col('retweeted_status').is_not_null()).select([
+            pl.col('retweet_count').alias('Retweets'),
+            pl.col('retweeted_status').struct.field('id').alias('TweetId'),
+            pl.col('retweeted_status').struct.field('favorite_count').alias('Favorites'),
+            pl.col('retweeted_status').struct.field('user').struct.field('followers_count').alias('Followers'),
+            pl.col('retweeted_status').struct.field('user').struct.field('screen_name').cast(pl.Categorical).alias('ScreenName'),
+            pl.col('text').alias('Text'),
+            pl.col('lang').cast(pl.Categorical).alias('Lang')
+        ])
+    df_agg = df.group_by(['ScreenName', 'TweetId', 'Followers']).agg([
+        pl.col('Retweets').sum().alias('Total_Retweets'),
+        pl.col('Favorites').sum().alias('Total_Favorites'),
+        pl.col('Text').first()
+    ]).select(['ScreenName', 'Text', 'Followers', 'Total_Retweets', 'Total_Favorites'])
+    # Convert at the boundary so the rest of the app keeps working with pandas
+    return df.to_pandas(), df_agg.to_pandas()
+
+if USE_NUMBA:
+    # No fastmath: it would let LLVM assume no infs, and zero followers must give inf as in NumPy.
+    # No parallel=True either: Streamlit runs the script off the main thread, where launching
+    # Numba's TBB threading layer can deadlock
+    @numba.njit(cache=True, error_model='numpy')
+    def engagement_rate_numba(retweets, favorites, followers):
+        """Computes (Retweets + Favorites) / Followers * 100 per row in a JIT-compiled loop."""
+        out = np.empty(retweets.size, np.float32)
+        for i in range(retweets.size):
+            out[i] = (retweets[i] + favorites[i]) / followers[i] * 100.0
+        return out
+
 # Note: Use st.cache_data for functions that load data to prevent re-running on every interaction
 @st.cache_data
 def load_data():
     """Loads all JSON data and performs initial data structuring."""
     try:
+        # Data files are keyed by modification time, along with the cache version and the
+        # aggregation settings, so edits to any of them invalidate the disk cache
+        cache_key = hashlib.md5(str((
+            CACHE_VERSION, USE_POLARS, USE_NUMBA,
+            [(p, os.path.getmtime(p)) for p in DATA_FILES]
+        )).encode()).hexdigest()
+        cached = load_disk_cache(cache_key)
+        if cached is not None:
+            return cached
+
         # Load trend data (Step 1)
-        with open("datasets/WWTrends.json") as f:
-            WW_trends = json.load(f)
-        with open("datasets/USTrends.json") as f:
-            US_trends = json.load(f)
-        
-        # Load tweets data (Step 4)
-        with open("datasets/WeLoveTheEarth.json") as f:
-            tweets = json.load(f)
+        with open("datasets/WWTrends.json", "rb") as f:
+            WW_trends = orjson.loads(f.read())
+        with open("datasets/USTrends.json", "rb") as f:
+            US_trends = orjson.loads(f.read())
             
     except FileNotFoundError:
         st.error("Data files not found. Ensure 'WWTrends.json', 'USTrends.json', and 'WeLoveTheEarth.json' are in a 'datasets' folder.")
-        return None, None, None, None
+        return None, None, None, None, None, None
 
     # Common Trends (Step 3)
-    world_trends = set([trend['name'] for trend in WW_trends[0]['trends']])
-    us_trends = set([trend['name'] for trend in US_trends[0]["trends"]])
-    common_trends = world_trends.intersection(us_trends)
-
-    # Prepare Tweet Activity DataFrame (Step 7 & 8)
-    retweets_data = []
-    for tweet in tweets:
-        if 'retweeted_status' in tweet:
-            retweets_data.append({
-                'Retweets': tweet['retweet_count'], 
-                'Favorites': tweet['retweeted_status']['favorite_count'],
-                'Followers': tweet['retweeted_status']['user']['followers_count'],
-                'ScreenName': tweet['retweeted_status']['user']['screen_name'],
-                'Text': tweet['text'],
-                'Lang': tweet['lang']
-            })
-    
-    # Aggregate data by original ScreenName and Text
-    df = pd.DataFrame(retweets_data)
-    
-    # Create the aggregated DataFrame for the table and charts
-    # We group by ScreenName, Text, and Followers of the original tweeter
-    df_agg = df.groupby(['ScreenName', 'Text', 'Followers']).agg(
-        Total_Retweets=('Retweets', 'sum'),
-        Total_Favorites=('Favorites', 'sum')
-    ).reset_index()
+    world_trends = {trend['name'] for trend in WW_trends[0]['trends']}
+    us_trends = {trend['name'] for trend in US_trends[0]['trends']}
+    # Intersect from the smaller set so fewer hash lookups are needed
+    smaller, larger = sorted((world_trends, us_trends), key=len)
+    common_trends = smaller & larger
+
+    # Load tweets data and prepare Tweet Activity DataFrame (Step 4, 7 & 8)
+    if USE_POLARS:
+        df, df_agg = aggregate_tweets_polars("datasets/WeLoveTheEarth.json")
+    else:
+        df, df_agg = aggregate_tweets("datasets/WeLoveTheEarth.json")
 
     # Calculate Normalized Engagement Rate (Goal of Step 9)
-    df_agg['Total_Engagement'] = df_agg['Total_Retweets'] + df_agg['Total_Favorites']
-    df_agg['Normalized_Engagement_Rate'] = (df_agg['Total_Engagement'] / df_agg['Followers']) * 100
+    # Work on the underlying NumPy arrays and scale the rate in place to skip temporaries
+    engagement = df_agg['Total_Retweets'].to_numpy() + df_agg['Total_Favorites'].to_numpy()
+    df_agg['Total_Engagement'] = engagement
+    if USE_NUMBA:
+        df_agg['Normalized_Engagement_Rate'] = engagement_rate_numba(
+            df_agg['Total_Retweets'].to_numpy(np.int64),
+            df_agg['Total_Favorites'].to_numpy(np.int64),
+            df_agg['Followers'].to_numpy(np.int64)
+        )
+    else:
+        rate = np.divide(engagement, df_agg['Followers'].to_numpy(), dtype=np.float64)
+        np.multiply(rate, 100, out=rate)
+        df_agg['Normalized_Engagement_Rate'] = rate
     df_agg = df_agg.sort_values(by='Followers', ascending=False)
+
+    # Downcast plotted columns to halve the payload serialized for the browser
+    for col in ['Followers', 'Total_Retweets', 'Total_Favorites']:
+        df_agg[col] = df_agg[col].astype('int32')
+    df_agg['Normalized_Engagement_Rate'] = df_agg['Normalized_Engagement_Rate'].astype('float32')
+
+    # Pre-sort for the bar chart: tweeters by their total rate, then each tweet by its rate,
+    # matching the 'total descending' category order Plotly would otherwise compute
+    tweeter_rate = df_agg.groupby('ScreenName', observed=True)['Normalized_Engagement_Rate'].transform('sum')
+    df_bar = (df_agg.assign(Tweeter_Rate=tweeter_rate)
+              .sort_values(by=['Tweeter_Rate', 'Normalized_Engagement_Rate'], ascending=False)
+              .drop(columns='Tweeter_Rate'))
     
     # Language Data (Step 9)
-    lang_counts = pd.DataFrame(Counter(df['Lang']).most_common(), columns=['Lang', 'Count'])
+    lang_counts = df['Lang'].value_counts().rename_axis('Lang').reset_index(name='Count')
+
+    save_disk_cache(cache_key, world_trends, us_trends, common_trends, df_agg, df_bar, lang_counts)
 
-    return world_trends, us_trends, common_trends, df_agg, lang_counts
+    return world_trends, us_trends, common_trends, df_agg, df_bar, lang_counts
 
 # --- VISUALIZATION FUNCTIONS ---
 
+def _hex_to_rgba(hex_color, alpha=1.0):
+    """Converts a '#rrggbb' palette entry to an 'rgba(r, g, b, a)' color string."""
+    r, g, b = (int(hex_color[i:i + 2], 16) for i in (1, 3, 5))
+    return f"rgba({r}, {g}, {b}, {alpha})"
+
+def screen_name_colors(screen_names):
+    """Maps each ScreenName to a qualitative palette color, resolved once in Python."""
+    palette = [_hex_to_rgba(c) for c in px.colors.qualitative.Plotly]
+    codes, uniques = pd.factorize(screen_names)
+    if len(uniques) < 2:
+        return palette[0] # A single tweeter needs one color, not a per-point array
+    return [palette[c % len(palette)] for c in codes]
+
+@st.cache_data
+def venn_svg(size_ww_only, size_us_only, size_common):
+    """Builds a static two-set Venn diagram as an SVG string."""
+    r = 100
+    # Circles overlap in proportion to the shared share of the larger set
+    overlap = size_common / max(size_ww_only + size_common, size_us_only + size_common, 1)
+    d = 2 * r * (1 - overlap)
+    cx_ww, cx_us, cy = 200 - d / 2, 200 + d / 2, 155
+
+    # Count labels sit at the middle of their region along the centre line: each exclusive
+    # crescent spans from its circle's outer edge to the lens, and the lens spans the overlap
+    lens_left, lens_right = cx_us - r, cx_ww + r
+    min_width = 30 # Narrower regions cannot hold a label, so it moves just outside them
+    if lens_left - (cx_ww - r) >= min_width:
+        ww_label = f'x="{(cx_ww - r + lens_left) / 2:.1f}" y="{cy}" text-anchor="middle"'
+        us_label = f'x="{(lens_right + cx_us + r) / 2:.1f}" y="{cy}" text-anchor="middle"'
+    else:
+        ww_label = f'x="{cx_ww - r - 8:.1f}" y="{cy}" text-anchor="end"'
+        us_label = f'x="{cx_us + r + 8:.1f}" y="{cy}" text-anchor="start"'
+    if lens_right - lens_left >= min_width:
+        common_label = f'x="{(lens_left + lens_right) / 2:.1f}" y="{cy}" text-anchor="middle"'
+    else:
+        common_label = f'x="{(lens_left + lens_right) / 2:.1f}" y="{cy + r + 20}" text-anchor="middle"'
+
+    return f"""<svg viewBox="0 0 400 285" width="100%" style="max-width:480px" xmlns="http://www.w3.org/2000/svg" font-family="sans-serif">
+  <text x="200" y="20" text-anchor="middle" font-size="16">WW &amp; US Trend Overlap: {size_common} Common Topics</text>
+  <text x="100" y="45" text-anchor="middle" font-size="14">WW Trends</text>
+  <text x="300" y="45" text-anchor="middle" font-size="14">US Trends</text>
+  <circle cx="{cx_ww:.1f}" cy="{cy}" r="{r}" fill="#ff0000" fill-opacity="0.4" />
+  <circle cx="{cx_us:.1f}" cy="{cy}" r="{r}" fill="#00aa00" fill-opacity="0.4" />
+  <text {ww_label} dominant-baseline="middle" font-size="18">{size_ww_only}</text>
+  <text {common_label} dominant-baseline="middle" font-size="18">{size_common}</text>
+  <text {us_label} dominant-baseline="middle" font-size="18">{size_us_only}</text>
+</svg>"""
+
 def create_venn_diagram(world_trends, us_trends, common_trends):
-    """Creates a Matplotlib Venn Diagram for Trend Overlap (Interactive is hard for Venn)."""
+    """Renders a precomputed SVG Venn Diagram for Trend Overlap (Interactive is hard for Venn)."""
     st.subheader("Interactive Common Trends Visualization")
     st.markdown("This Venn diagram shows the overlap between the **WorldWide** and **US** Top 50 trends.")
     
-    # Matplotlib setup for Streamlit
-    fig, ax = plt.subplots()
-    
     # Calculate sizes for the Venn diagram
     size_ww_only = len(world_trends) - len(common_trends)
     size_us_only = len(us_trends) - len(common_trends)
     size_common = len(common_trends)
     
-    # Generate Venn diagram
-    venn2(subsets=(size_ww_only, size_us_only, size_common), 
-          set_labels=('WW Trends', 'US Trends'),
-          ax=ax)
-    ax.set_title(f"WW & US Trend Overlap: {size_common} Common Topics")
-    
-    st.pyplot(fig)
+    # A static SVG avoids building and rasterizing a Matplotlib figure on every rerun
+    st.markdown(venn_svg(size_ww_only, size_us_only, size_common), unsafe_allow_html=True)
     
     with st.expander("Common Trends List"):
         st.write(list(common_trends))
 
-def create_engagement_scatter(df_agg):
-    """Creates an interactive Plotly Scatter Plot for Tweet Activity."""
-    st.subheader("Tweet Activity: Retweets vs. Favorites")
-    st.markdown("Bubble size represents the original tweeter's **Followers** (log scale). Hover for details.")
-
-    # Plotly Scatter Plot (Bubble Chart)
-    fig = px.scatter(
-        df_agg,
-        x='Total_Retweets',
-        y='Total_Favorites',
-        size='Followers',
-        color='ScreenName',
-        hover_name='ScreenName',
-        log_x=True,
-        log_y=True,
-        size_max=80,
-        template='plotly_white',
-        title='Engagement by Celebrity (Log-Log Scale)'
+@st.cache_data
+def top10_table_html(df_agg):
+    """Renders the top 10 tweets table, with its engagement color gradient, to static HTML."""
+    html = (
+        df_agg[['ScreenName', 'Followers', 'Total_Retweets', 'Total_Favorites', 'Normalized_Engagement_Rate', 'Text']].head(10)
+        .style.background_gradient(cmap='Greens', subset=['Normalized_Engagement_Rate'])
+        .format({'Followers': '{:,}', 'Total_Retweets': '{:,}', 'Total_Favorites': '{:,}', 'Normalized_Engagement_Rate': '{:.4f}%'})
+        # Tweet content is untrusted and the HTML is rendered unsafely, so escape it
+        .format(subset=['ScreenName', 'Text'], escape='html')
+        .to_html()
     )
-    
-    # Enhance tooltips to show key information
-    fig.update_traces(
-        hovertemplate="<b>%{hovertext}</b><br><br>" +
+    # Blank lines (from multi-paragraph tweets) would end the HTML block in st.markdown;
+    # HTML collapses the whitespace anyway
+    return "\n".join(line for line in html.splitlines() if line.strip())
+
+def frame_hash(df):
+    """Hashes a DataFrame's contents so cached figures are reused while the data is unchanged."""
+    return hashlib.md5(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()).hexdigest()
+
+# Note: Figure builders use st.cache_resource keyed on frame_hash; the leading underscore
+# keeps Streamlit from re-hashing the DataFrame argument itself
+@st.cache_resource
+def build_engagement_scatter(df_hash, _df_agg):
+    """Builds the Retweets vs. Favorites bubble chart figure."""
+    # Plotly Scatter Plot (Bubble Chart) as a single WebGL trace built from NumPy arrays
+    followers = _df_agg['Followers'].to_numpy()
+    fig = go.Figure(go.Scattergl(
+        x=_df_agg['Total_Retweets'].to_numpy(),
+        y=_df_agg['Total_Favorites'].to_numpy(),
+        mode='markers',
+        marker=dict(
+            size=followers,
+            sizemode='area',
+            sizeref=followers.max() / 80 ** 2, # Same scaling as px.scatter with size_max=80
+            color=screen_name_colors(_df_agg['ScreenName'])
+        ),
+        text=_df_agg['ScreenName'],
+        # Enhance tooltips to show key information
+        hovertemplate="<b>%{text}</b><br><br>" +
                       "Followers: %{marker.size:,}<br>" +
                       "Total Retweets: %{x:,}<br>" +
                       "Total Favorites: %{y:,}<br>" +
                       "<extra></extra>"
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-def create_engagement_bar_chart(df_agg):
-    """Creates an interactive Plotly Bar Chart for Normalized Engagement."""
-    st.subheader("Normalized Engagement Rate")
-    st.markdown("Shows engagement as $\\frac{\\text{Retweets} + \\text{Favorites}}{\\text{Followers}}$ (x100). Highlights **Lil Dicky's** high relative success.")
-    
-    # Sort by Normalized Engagement Rate for the bar chart
-    df_chart = df_agg.sort_values(by='Normalized_Engagement_Rate', ascending=False)
-    
-    fig = px.bar(
-        df_chart,
-        x='ScreenName',
-        y='Normalized_Engagement_Rate',
-        color='ScreenName',
-        hover_data=['Followers', 'Total_Retweets', 'Total_Favorites'],
+    ))
+    fig.update_xaxes(type='log', title='Total_Retweets')
+    fig.update_yaxes(type='log', title='Total_Favorites')
+    fig.update_layout(template='plotly_white', title='Engagement by Celebrity (Log-Log Scale)')
+    return fig
+
+@st.cache_resource
+def build_engagement_bar_chart(df_hash, _df_bar):
+    """Builds the Normalized Engagement Rate bar chart figure."""
+    # df_bar arrives pre-sorted from load_data, so Plotly keeps the data order
+    fig = go.Figure(go.Bar(
+        x=_df_bar['ScreenName'].to_numpy(),
+        y=_df_bar['Normalized_Engagement_Rate'].to_numpy(),
+        marker=dict(color=screen_name_colors(_df_bar['ScreenName'])),
+        customdata=_df_bar[['Followers', 'Total_Retweets', 'Total_Favorites']].to_numpy(),
+        hovertemplate="<b>%{x}</b><br><br>" +
+                      "Normalized_Engagement_Rate: %{y}<br>" +
+                      "Followers: %{customdata[0]}<br>" +
+                      "Total_Retweets: %{customdata[1]}<br>" +
+                      "Total_Favorites: %{customdata[2]}<br>" +
+                      "<extra></extra>"
+    ))
+    # Tweeters with several tweets stack, as they did under px.bar
+    fig.update_layout(
+        barmode='relative',
+        xaxis_title='ScreenName',
+        yaxis_title='Normalized_Engagement_Rate',
         template='plotly_white',
         title='Relative Engagement Success by Tweeter'
     )
-    fig.update_layout(xaxis={'categoryorder':'total descending'})
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-def create_language_map_and_chart(lang_counts):
-    """Creates a Choropleth map (using a simplified mapping) and a Bar Chart for language distribution."""
-    st.subheader("Trend Global Reach: Language Distribution")
-    
+@st.cache_resource
+def build_language_figures(df_hash, _lang_counts):
+    """Builds the language Choropleth map and the full language Bar Chart figures."""
     # Simple Lang to Country Code Mapping for Plotly Choropleth
-    # Plotly's choropleth needs ISO-3 or ISO-2 country codes. We use a simple map of major languages.
+    # Plotly's choropleth resolves ISO-3 codes directly, skipping its country-name lookup.
+    # We use a simple map of major languages.
+    lang_to_iso3 = {
+        'en': 'USA',
+        'es': 'ESP',
+        'it': 'ITA',
+        'pl': 'POL',
+        'ja': 'JPN',
+        'fr': 'FRA',
+        'de': 'DEU',
+        'tr': 'TUR', # assuming 'tr' for Turkish
+        'ru': 'RUS',
+        'ko': 'KOR'
+        # 'und' (undetermined) and others are hard to map to a single country, so we focus on the major ones.
+    }
+    # Country names are kept for the hover labels only
     lang_to_country = {
-        'en': 'USA', # Plotly uses Country Names or ISO codes
+        'en': 'USA',
         'es': 'Spain',
         'it': 'Italy',
         'pl': 'Poland',
         'ja': 'Japan',
         'fr': 'France',
         'de': 'Germany',
-        'tr': 'Turkey', # assuming 'tr' for Turkish
+        'tr': 'Turkey',
         'ru': 'Russia',
         'ko': 'South Korea'
-        # 'und' (undetermined) and others are hard to map to a single country, so we focus on the major ones.
     }
     
     # Filter and map data for the map
-    df_map = lang_counts[lang_counts['Lang'].isin(lang_to_country.keys())].copy()
+    df_map = _lang_counts[_lang_counts['Lang'].isin(lang_to_iso3.keys())].copy()
+    df_map['ISO3'] = df_map['Lang'].map(lang_to_iso3)
     df_map['Country'] = df_map['Lang'].map(lang_to_country)
-    
-    st.markdown("### Choropleth Map (Simplified)")
-    st.markdown("Map colors show the count of tweets for the **major** languages in the dataset, mapped to their primary country. This gives a visual sense of global discussion.")
 
     # Create the Choropleth Map
     fig_map = px.choropleth(
         df_map,
-        locations='Country',
-        locationmode='country names', # Instruct Plotly to use country names
+        locations='ISO3',
+        locationmode='ISO-3', # Instruct Plotly to use ISO-3 country codes
         color='Count',
         hover_name='Country',
         color_continuous_scale=px.colors.sequential.Plasma,
@@ -180,14 +426,10 @@ def create_language_map_and_chart(lang_counts):
         template='plotly_white'
     )
     fig_map.update_layout(margin={"r":0,"t":50,"l":0,"b":0})
-    st.plotly_chart(fig_map, use_container_width=True)
-
-    st.markdown("### Full Language Count Bar Chart")
-    st.markdown("The bar chart includes all language codes, including **'und' (undetermined)**, which accounted for a large volume of tweets.")
 
     # Create the Language Bar Chart (Full data)
     fig_bar = px.bar(
-        lang_counts,
+        _lang_counts,
         x='Lang',
         y='Count',
         color='Lang',
@@ -195,6 +437,48 @@ def create_language_map_and_chart(lang_counts):
         template='plotly_white'
     )
     fig_bar.update_layout(xaxis={'categoryorder':'total descending'})
+    return fig_map, fig_bar
+
+def create_engagement_scatter(df_agg):
+    """Creates an interactive Plotly Scatter Plot for Tweet Activity."""
+    st.subheader("Tweet Activity: Retweets vs. Favorites")
+    st.markdown("Bubble size represents the original tweeter's **Followers** (log scale). Hover for details.")
+
+    if df_agg.empty:
+        st.info("No data")
+        return
+
+    fig = build_engagement_scatter(frame_hash(df_agg), df_agg)
+    st.plotly_chart(fig, use_container_width=True)
+    
+def create_engagement_bar_chart(df_bar):
+    """Creates an interactive Plotly Bar Chart for Normalized Engagement."""
+    st.subheader("Normalized Engagement Rate")
+    st.markdown("Shows engagement as $\\frac{\\text{Retweets} + \\text{Favorites}}{\\text{Followers}}$ (x100). Highlights **Lil Dicky's** high relative success.")
+    
+    if df_bar.empty:
+        st.info("No data")
+        return
+
+    fig = build_engagement_bar_chart(frame_hash(df_bar), df_bar)
+    st.plotly_chart(fig, use_container_width=True)
+
+def create_language_map_and_chart(lang_counts):
+    """Creates a Choropleth map (using a simplified mapping) and a Bar Chart for language distribution."""
+    st.subheader("Trend Global Reach: Language Distribution")
+
+    if lang_counts.empty:
+        st.info("No data")
+        return
+
+    fig_map, fig_bar = build_language_figures(frame_hash(lang_counts), lang_counts)
+    
+    st.markdown("### Choropleth Map (Simplified)")
+    st.markdown("Map colors show the count of tweets for the **major** languages in the dataset, mapped to their primary country. This gives a visual sense of global discussion.")
+    st.plotly_chart(fig_map, use_container_width=True)
+
+    st.markdown("### Full Language Count Bar Chart")
+    st.markdown("The bar chart includes all language codes, including **'und' (undetermined)**, which accounted for a large volume of tweets.")
     st.plotly_chart(fig_bar, use_container_width=True)
 
 
@@ -208,7 +492,7 @@ def main():
     st.info("The data analysis reveals that while major celebrities have huge follower counts, **Lil Dicky** achieved the highest *relative* engagement rate with his tweet for the Earth Day music video.")
     
     # Load all processed data
-    world_trends, us_trends, common_trends, df_agg, lang_counts = load_data()
+    world_trends, us_trends, common_trends, df_agg, df_bar, lang_counts = load_data()
 
     if world_trends is None:
         return # Stop execution if data loading failed
@@ -221,17 +505,16 @@ def main():
 
     # --- SECTION 2: Engagement Analysis ---
     st.header("2. Celebrity Activity & Engagement")
-    st.dataframe(
-        df_agg[['ScreenName', 'Followers', 'Total_Retweets', 'Total_Favorites', 'Normalized_Engagement_Rate', 'Text']].head(10)
-        .style.background_gradient(cmap='Greens', subset=['Normalized_Engagement_Rate'])
-        .format({'Followers': '{:,}', 'Total_Retweets': '{:,}', 'Total_Favorites': '{:,}', 'Normalized_Engagement_Rate': '{:.4f}%'})
-    )
+    if df_agg.empty:
+        st.info("No data")
+    else:
+        st.markdown(top10_table_html(df_agg), unsafe_allow_html=True)
     
     col1, col2 = st.columns(2)
     with col1:
         create_engagement_scatter(df_agg)
     with col2:
-        create_engagement_bar_chart(df_agg)
+        create_engagement_bar_chart(df_bar)
 
     st.markdown("---")
 